@@ -1,10 +1,15 @@
 import streamlit as st
 from apps.erp_index.utils.data_loader import ERPDataLoader
+from apps.erp_index.utils.scenario import compute_scenario_grid
+from apps.erp_index.utils.signals import SignalScanner, SCAN_WINDOWS, DEFAULT_THRESHOLDS, CROSS, ZSCORE
 from apps.erp_index.utils.plot_utils import (
     create_time_series_plot,
     create_market_erp_comparison,
     create_distribution_plot,
-    create_rolling_stats_plot
+    create_rolling_stats_plot,
+    create_scenario_heatmap,
+    create_scenario_surface,
+    SCENARIO_STATS
 )
 
 # 设置页面标题
@@ -20,6 +25,11 @@ def load_data():
         st.error(f"数据加载失败：{str(e)}")
         return None
 
+# 计算情景网格（PE ±20%、无风险利率 ±100bp）
+@st.cache_data
+def load_scenario_grid(data, markets):
+    return compute_scenario_grid(data, list(markets))
+
 # 确保数据被加载并存储到session state
 if "data" not in st.session_state:
     st.session_state.data = load_data()
@@ -58,8 +68,27 @@ selected_markets = st.multiselect(
     }[x]
 )
 
+# 信号标记
+col1, col2 = st.columns(2)
+with col1:
+    signal_kind = st.selectbox("信号标记", ["无", "阈值穿越", "±2σ偏离"])
+with col2:
+    if signal_kind == "阈值穿越":
+        signal_param = st.selectbox("ERP阈值（%）", DEFAULT_THRESHOLDS, index=2)
+    elif signal_kind == "±2σ偏离":
+        signal_param = st.select_slider("滚动窗口（交易日）", SCAN_WINDOWS, value=252)
+
+signals = None
+if signal_kind != "无":
+    # 扫描器保存在session state中，首次使用时全量扫描，之后只扫描新增的行
+    if "signal_scanner" not in st.session_state:
+        st.session_state.signal_scanner = SignalScanner(["CSI300", "HSI_mixed", "HSI_cn", "HSI_us", "SPX"])
+    scanner = st.session_state.signal_scanner
+    scanner.update(data)
+    signals = scanner.events_by_market(CROSS if signal_kind == "阈值穿越" else ZSCORE, signal_param)
+
 if selected_markets:
-    fig = create_time_series_plot(data, selected_markets)
+    fig = create_time_series_plot(data, selected_markets, signals=signals)
     st.plotly_chart(fig, use_container_width=True)
 else:
     st.warning("请选择至少一个市场")
@@ -79,7 +108,9 @@ selected_market = st.selectbox(
 )
 
 if selected_market:
-    fig = create_market_erp_comparison(data, selected_market)
+    fig = create_market_erp_comparison(
+        data, selected_market, signals=signals[selected_market] if signals else None
+    )
     st.plotly_chart(fig, use_container_width=True)
 
 # 显示分布特征
@@ -93,6 +124,39 @@ window = st.slider("选择滚动窗口大小（交易日）", min_value=21, max_
 fig = create_rolling_stats_plot(data, window)
 st.plotly_chart(fig, use_container_width=True)
 
+# 显示情景分析
+st.header("ERP情景分析")
+st.caption("PE重估 ±20%、无风险利率 ±100bp 情景下的ERP")
+col1, col2, col3 = st.columns(3)
+with col1:
+    scenario_market = st.selectbox(
+        "选择市场",
+        ["CSI300", "HSI_mixed", "HSI_cn", "HSI_us", "SPX"],
+        format_func=lambda x: {
+            "CSI300": "沪深300",
+            "HSI_mixed": "恒生指数(混合)",
+            "HSI_cn": "恒生指数(中债)",
+            "HSI_us": "恒生指数(美债)",
+            "SPX": "标普500"
+        }[x],
+        key="scenario_market"
+    )
+with col2:
+    scenario_stat = st.selectbox(
+        "统计量",
+        list(SCENARIO_STATS),
+        format_func=lambda x: SCENARIO_STATS[x]
+    )
+with col3:
+    scenario_view = st.radio("图表类型", ["热力图", "曲面图"], horizontal=True)
+
+grid = load_scenario_grid(data, ("CSI300", "HSI_mixed", "HSI_cn", "HSI_us", "SPX"))
+if scenario_view == "热力图":
+    fig = create_scenario_heatmap(grid, scenario_market, scenario_stat)
+else:
+    fig = create_scenario_surface(grid, scenario_market, scenario_stat)
+st.plotly_chart(fig, use_container_width=True)
+
 # 添加制作人信息
 st.markdown("---")
 st.markdown("<div style='text-align: right'>By wilson x</div>", unsafe_allow_html=True) 
\ No newline at end of file
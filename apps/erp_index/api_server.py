@@ -0,0 +1,350 @@
+"""ERP数据只读查询服务
+
+供 notebook、报告生成等内部工具通过HTTP获取ERP序列、统计量和相关性，
+无需在各自进程中重新运行 ERPDataLoader。可与 app.py 同时运行：
+
+    python -m apps.erp_index.api_server --port 8601
+
+接口（均为GET，参数可选）：
+    /markets                       市场列表
+    /series?markets=&start=&end=&fields=
+    /stats?markets=&start=&end=
+    /correlation?markets=&start=&end=
+
+markets 以逗号分隔，可一次请求多个市场；start/end 为 YYYY-MM-DD。
+响应带有基于数据版本的 ETag，If-None-Match 命中时返回 304；
+请求头包含 Accept-Encoding: gzip 时返回gzip压缩内容。
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from .utils.data_loader import ERPDataLoader
+
+SERIES_FIELDS = ["erp", "pe", "rf", "close"]
+
+# 响应缓存的最大条目数
+RESPONSE_CACHE_SIZE = 256
+
+class QueryError(ValueError):
+    """请求参数错误，对应HTTP 400"""
+
+class ERPDataStore:
+    """在服务进程内共享的ERP数据，按时间间隔重新加载并维护数据版本号"""
+
+    def __init__(self, loader: ERPDataLoader = None, reload_interval: float = 300):
+        self._loader = loader or ERPDataLoader()
+        self._reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._loaded_at = 0.0
+        self.data = None
+        self.version = None
+        self.reload()
+
+    def reload(self):
+        """重新加载数据，版本号由内容决定，内容未变化时保持不变"""
+        data = self._loader.load_latest_data()
+        # 加载器生成的 trade_date 带有加载时刻，只保留日期，使相同数据的版本号稳定
+        for market, df in data["time_series"].items():
+            data["time_series"][market] = df.assign(trade_date=df["trade_date"].dt.normalize())
+        version = self._compute_version(data["time_series"])
+        with self._lock:
+            self.data = data
+            self.version = version
+            self._loaded_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        """距上次加载超过 reload_interval 时重新加载"""
+        if not self._reload_interval or time.monotonic() - self._loaded_at <= self._reload_interval:
+            return
+        # 已有线程在重新加载时，其余请求继续使用旧数据
+        if self._reload_lock.acquire(blocking=False):
+            try:
+                self.reload()
+            finally:
+                self._reload_lock.release()
+
+    def snapshot(self):
+        """返回一致的 (数据, 版本号)"""
+        with self._lock:
+            return self.data, self.version
+
+    @staticmethod
+    def _compute_version(time_series: dict) -> str:
+        """根据各市场数据内容计算版本号"""
+        digest = hashlib.sha1()
+        for market in sorted(time_series):
+            digest.update(market.encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(time_series[market], index=False).values.tobytes())
+        return digest.hexdigest()[:16]
+
+def _parse_markets(params: dict, time_series: dict) -> list:
+    """解析 markets 参数，缺省时返回全部市场"""
+    raw = params.get("markets", [""])[0]
+    if not raw:
+        return list(time_series)
+    markets = [m.strip() for m in raw.split(",") if m.strip()]
+    unknown = [m for m in markets if m not in time_series]
+    if unknown:
+        raise QueryError(f"未知市场：{','.join(unknown)}")
+    return markets
+
+def _parse_date(params: dict, key: str):
+    """解析 start/end 日期参数"""
+    raw = params.get(key, [""])[0]
+    if not raw:
+        return None
+    try:
+        value = pd.Timestamp(raw)
+    except ValueError:
+        raise QueryError(f"日期格式错误：{key}={raw}")
+    if value.tzinfo is not None:
+        raise QueryError(f"日期不能带时区：{key}={raw}")
+    return value.normalize()
+
+def _slice_dates(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """按日期区间截取数据（闭区间，trade_date 可能带有时刻）"""
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df["trade_date"] >= start
+    if end is not None:
+        mask &= df["trade_date"] < end + pd.Timedelta(days=1)
+    return df[mask]
+
+def _to_list(values: pd.Series) -> list:
+    """转换为JSON列表，NaN转为null"""
+    return values.astype(object).where(values.notna(), None).tolist()
+
+def query_series(data: dict, params: dict) -> dict:
+    """各市场的ERP时间序列"""
+    time_series = data["time_series"]
+    markets = _parse_markets(params, time_series)
+    start, end = _parse_date(params, "start"), _parse_date(params, "end")
+    raw_fields = params.get("fields", [""])[0]
+    fields = [f for f in raw_fields.split(",") if f] or SERIES_FIELDS
+    unknown = [f for f in fields if f not in SERIES_FIELDS]
+    if unknown:
+        raise QueryError(f"未知字段：{','.join(unknown)}")
+
+    result = {}
+    for market in markets:
+        df = _slice_dates(time_series[market], start, end)
+        columns = {"trade_date": df["trade_date"].dt.strftime("%Y-%m-%d").tolist()}
+        for field in fields:
+            if field in df.columns:
+                columns[field] = _to_list(df[field])
+        result[market] = columns
+    return result
+
+def query_stats(data: dict, params: dict) -> dict:
+    """各市场ERP的描述性统计"""
+    time_series = data["time_series"]
+    markets = _parse_markets(params, time_series)
+    start, end = _parse_date(params, "start"), _parse_date(params, "end")
+
+    result = {}
+    for market in markets:
+        erp = _slice_dates(time_series[market], start, end)["erp"].dropna()
+        stats = {
+            "mean": erp.mean(),
+            "median": erp.median(),
+            "std": erp.std(),
+            "min": erp.min(),
+            "max": erp.max(),
+            "skew": erp.skew(),
+            "kurtosis": erp.kurtosis(),
+        }
+        result[market] = {"count": int(len(erp))}
+        result[market].update({k: (None if pd.isna(v) else float(v)) for k, v in stats.items()})
+    return result
+
+def query_correlation(data: dict, params: dict) -> dict:
+    """按交易日对齐后的市场间ERP相关系数矩阵"""
+    time_series = data["time_series"]
+    markets = _parse_markets(params, time_series)
+    start, end = _parse_date(params, "start"), _parse_date(params, "end")
+
+    aligned = pd.DataFrame({
+        market: _slice_dates(time_series[market], start, end).set_index("trade_date")["erp"]
+        for market in markets
+    })
+    corr = aligned.corr()
+    return {
+        "markets": markets,
+        "matrix": [_to_list(corr[market]) for market in markets],
+    }
+
+ROUTES = {
+    "/series": query_series,
+    "/stats": query_stats,
+    "/correlation": query_correlation,
+    "/markets": lambda data, params: {"markets": list(data["time_series"])},
+}
+
+class ResponseCache:
+    """按 (数据版本, 规范化请求) 缓存已序列化的响应体"""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+def _canonical_query(path: str, params: dict) -> str:
+    """规范化请求，使参数顺序不同的相同请求共用ETag和缓存"""
+    items = sorted((k, ",".join(v)) for k, v in params.items())
+    return path + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+def make_etag(version: str, canonical: str, gzipped: bool) -> str:
+    """ETag由数据版本和请求内容决定，gzip响应使用不同的ETag"""
+    digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+    return f'"{version}-{digest}{"-gz" if gzipped else ""}"'
+
+def _accepts_gzip(header: str) -> bool:
+    """按 Accept-Encoding 的q值判断客户端是否接受gzip（q=0 表示不接受）"""
+    accepted = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted.get("gzip", accepted.get("*", 0.0)) > 0
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """判断 If-None-Match 是否命中"""
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class ERPRequestHandler(BaseHTTPRequestHandler):
+    """ERP查询请求处理"""
+
+    store: ERPDataStore = None
+    cache: ResponseCache = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        handler = ROUTES.get(url.path)
+        if handler is None:
+            self._send_json(404, {"error": f"未知路径：{url.path}"})
+            return
+
+        self.store.refresh_if_stale()
+        data, version = self.store.snapshot()
+        params = parse_qs(url.query)
+        canonical = _canonical_query(url.path, params)
+        use_gzip = _accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = make_etag(version, canonical, use_gzip)
+
+        # 数据未变化时直接返回304，不计算响应体
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        cache_key = (version, canonical, use_gzip)
+        body = self.cache.get(cache_key)
+        if body is None:
+            try:
+                payload = handler(data, params)
+            except QueryError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self.log_error("查询失败 %s: %r", self.path, e)
+                self._send_json(500, {"error": "服务内部错误"})
+                return
+            body = json.dumps(
+                {"version": version, "data": payload},
+                ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+            if use_gzip:
+                body = gzip.compress(body, compresslevel=5)
+            self.cache.put(cache_key, body)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_request(self, code="-", size="-"):
+        # 压测时逐条打印访问日志会成为瓶颈，错误日志仍通过 log_error 输出
+        pass
+
+def create_server(host: str = "127.0.0.1", port: int = 8601,
+                  store: ERPDataStore = None) -> ThreadingHTTPServer:
+    """创建查询服务（未启动）"""
+    handler = type("BoundERPRequestHandler", (ERPRequestHandler,), {
+        "store": store or ERPDataStore(),
+        "cache": ResponseCache(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="ERP数据只读查询服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8601)
+    parser.add_argument("--reload-interval", type=float, default=300,
+                        help="数据重新加载间隔（秒），0表示不重新加载")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port,
+                           ERPDataStore(reload_interval=args.reload_interval))
+    print(f"ERP查询服务已启动：http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,83 @@ import pandas as pd
 import numpy as np
 import scipy.stats as stats
 
-def create_time_series_plot(data: dict, markets: list) -> go.Figure:
-    """创建ERP时间序列对比图"""
+# 渲染后端："svg" 使用 go.Scatter，"webgl" 使用 go.Scattergl，"auto" 按数据点数自动选择
+RENDER_BACKENDS = ("auto", "svg", "webgl")
+
+# auto 模式下，图表总数据点数超过该阈值时切换到 WebGL
+WEBGL_POINT_THRESHOLD = 10000
+
+# 情景网格统计量的显示名称
+SCENARIO_STATS = {
+    "latest": "最新",
+    "mean": "历史均值",
+    "min": "历史最小值",
+    "max": "历史最大值",
+    "std": "历史标准差"
+}
+
+def _resolve_backend(backend: str, n_points: int) -> str:
+    """根据后端选项和数据点数确定实际使用的渲染后端"""
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"未知的渲染后端：{backend}，可选值为 {RENDER_BACKENDS}")
+    if backend == "auto":
+        return "webgl" if n_points > WEBGL_POINT_THRESHOLD else "svg"
+    return backend
+
+def _to_epoch_ms(dates) -> np.ndarray:
+    """将日期序列转换为毫秒时间戳（plotly日期轴可直接识别）
+
+    plotly.js 不支持 int64 类型数组，int64 会退化为JSON数字列表，
+    因此转为 float64（毫秒时间戳在 2^53 以内可精确表示）。
+    """
+    values = pd.to_datetime(dates).to_numpy(dtype="datetime64[ms]")
+    return np.ascontiguousarray(values.astype(np.int64), dtype=np.float64)
+
+def _to_float_array(values) -> np.ndarray:
+    """将数值序列转换为连续的float64数组"""
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+
+def _line_trace(x, y, backend: str, **kwargs):
+    """按渲染后端创建折线trace
+
+    webgl 模式下使用 go.Scattergl，并以 NumPy 数组传入数据，
+    plotly 会将其编码为二进制类型数组而不是JSON数字列表。
+    """
+    if backend == "webgl":
+        return go.Scattergl(x=_to_epoch_ms(x), y=_to_float_array(y), **kwargs)
+    return go.Scatter(x=x, y=y, **kwargs)
+
+def _add_signal_markers(fig, df, events, backend, color=None, name="信号", **trace_kwargs):
+    """在ERP曲线上叠加信号事件的起点标记，向上/向下三角表示方向"""
+    if events is None or len(events) == 0:
+        return
+    starts = events["start"]
+    fig.add_trace(_line_trace(
+        df["trade_date"].iloc[starts],
+        df["erp"].iloc[starts],
+        backend,
+        name=name,
+        mode="markers",
+        marker=dict(
+            symbol=np.where(events["direction"] > 0, "triangle-up", "triangle-down"),
+            size=9,
+            color=color,
+            line=dict(width=1, color="white")
+        ),
+        customdata=df["trade_date"].iloc[events["end"]].dt.strftime("%Y-%m-%d"),
+        hovertemplate="%{x|%Y-%m-%d} ~ %{customdata}<br>ERP: %{y:.2f}%<extra>" + name + "</extra>"
+    ), **trace_kwargs)
+
+def create_time_series_plot(data: dict, markets: list, backend: str = "auto",
+                            signals: dict = None) -> go.Figure:
+    """创建ERP时间序列对比图
+
+    signals 为 {市场代码: 事件数组}（见 SignalScanner.events_by_market），用于叠加信号标记。
+    """
     fig = go.Figure()
+    backend = _resolve_backend(
+        backend, sum(len(data["time_series"][market]) for market in markets)
+    )
     
     market_names = {
         "CSI300": "沪深300",
@@ -28,17 +102,25 @@ def create_time_series_plot(data: dict, markets: list) -> go.Figure:
     
     for market in markets:
         df = data["time_series"][market]
-        fig.add_trace(go.Scatter(
-            x=df["trade_date"],
-            y=df["erp"],  # ERP数据已经是百分比形式
+        fig.add_trace(_line_trace(
+            df["trade_date"],
+            df["erp"],  # ERP数据已经是百分比形式
+            backend,
             name=market_names.get(market, market),
             mode="lines",
             line=dict(color=market_colors.get(market))
         ))
+        if signals:
+            _add_signal_markers(
+                fig, df, signals.get(market), backend,
+                color=market_colors.get(market),
+                name=f"{market_names.get(market, market)} 信号"
+            )
     
     fig.update_layout(
         title="各市场ERP走势对比",
         xaxis_title="日期",
+        xaxis_type="date",
         yaxis_title="股权风险溢价 (ERP %)",
         template="plotly_white",
         hovermode="x unified",
@@ -60,18 +142,24 @@ def create_time_series_plot(data: dict, markets: list) -> go.Figure:
     
     return fig
 
-def create_market_erp_comparison(data: dict, market: str) -> go.Figure:
-    """创建市场ERP对比图"""
+def create_market_erp_comparison(data: dict, market: str, backend: str = "auto",
+                                 signals=None) -> go.Figure:
+    """创建市场ERP对比图
+
+    signals 为该市场的事件数组，用于在ERP曲线上叠加信号标记。
+    """
     df = data["time_series"][market]
+    backend = _resolve_backend(backend, 2 * len(df))
     
     # 创建双Y轴图表
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     
     # 添加指数数据
     fig.add_trace(
-        go.Scatter(
-            x=df["trade_date"],
-            y=df["close"],
+        _line_trace(
+            df["trade_date"],
+            df["close"],
+            backend,
             name="指数",
             line=dict(color="#1f77b4")
         ),
@@ -80,19 +168,22 @@ def create_market_erp_comparison(data: dict, market: str) -> go.Figure:
     
     # 添加ERP数据（数据已经是百分比形式）
     fig.add_trace(
-        go.Scatter(
-            x=df["trade_date"],
-            y=df["erp"],  # 原始数据已经是百分比形式
+        _line_trace(
+            df["trade_date"],
+            df["erp"],  # 原始数据已经是百分比形式
+            backend,
             name="ERP",
             line=dict(color="#ff7f0e")
         ),
         secondary_y=True
     )
+    _add_signal_markers(fig, df, signals, backend, color="#d62728", secondary_y=True)
     
     # 更新布局
     fig.update_layout(
         title=f"{market} 指数与ERP对比",
         xaxis_title="日期",
+        xaxis_type="date",
         hovermode="x unified",
         showlegend=True
     )
@@ -187,12 +278,16 @@ def create_distribution_plot(data: dict, markets: list) -> go.Figure:
     
     return fig
 
-def create_rolling_stats_plot(data, window):
+def create_rolling_stats_plot(data, window, backend="auto"):
     """创建滚动统计图表"""
     fig = make_subplots(rows=2, cols=1, subplot_titles=('滚动平均', '滚动标准差'))
     
     # 定义市场列表和颜色
     markets = ["CSI300", "HSI_mixed", "HSI_cn", "HSI_us", "SPX"]
+    backend = _resolve_backend(
+        backend,
+        2 * sum(len(data["time_series"][m]) for m in markets if m in data["time_series"])
+    )
     colors = {
         "CSI300": "red",
         "HSI_mixed": "blue",
@@ -209,9 +304,10 @@ def create_rolling_stats_plot(data, window):
             # 计算滚动平均
             rolling_mean = df["erp"].rolling(window=window).mean()
             fig.add_trace(
-                go.Scatter(
-                    x=df["trade_date"],  # 使用trade_date作为x轴
-                    y=rolling_mean,
+                _line_trace(
+                    df["trade_date"],  # 使用trade_date作为x轴
+                    rolling_mean,
+                    backend,
                     name=f"{market} 均值",
                     line=dict(color=colors[market])
                 ),
@@ -221,9 +317,10 @@ def create_rolling_stats_plot(data, window):
             # 计算滚动标准差
             rolling_std = df["erp"].rolling(window=window).std()
             fig.add_trace(
-                go.Scatter(
-                    x=df["trade_date"],  # 使用trade_date作为x轴
-                    y=rolling_std,
+                _line_trace(
+                    df["trade_date"],  # 使用trade_date作为x轴
+                    rolling_std,
+                    backend,
                     name=f"{market} 标准差",
                     line=dict(color=colors[market])
                 ),
@@ -247,9 +344,65 @@ def create_rolling_stats_plot(data, window):
     )
     
     # 更新轴标题
-    fig.update_xaxes(title_text="日期", row=1, col=1)
-    fig.update_xaxes(title_text="日期", row=2, col=1)
+    fig.update_xaxes(title_text="日期", type="date", row=1, col=1)
+    fig.update_xaxes(title_text="日期", type="date", row=2, col=1)
     fig.update_yaxes(title_text="ERP (%)", row=1, col=1)
     fig.update_yaxes(title_text="标准差 (%)", row=2, col=1)
     
-    return fig 
\ No newline at end of file
+    return fig
+
+def _scenario_axes(grid: dict, market: str, stat: str):
+    """返回情景图的 (rf冲击bp, PE冲击%, ERP矩阵)"""
+    if stat not in SCENARIO_STATS:
+        raise ValueError(f"未知的情景统计量：{stat}，可选值为 {list(SCENARIO_STATS)}")
+    i = grid["markets"].index(market)
+    return grid["rf_shocks"] * 10000, grid["pe_shocks"] * 100, grid[stat][i]
+
+def create_scenario_heatmap(grid: dict, market: str, stat: str = "latest") -> go.Figure:
+    """创建PE与无风险利率冲击下的ERP情景热力图"""
+    rf_bp, pe_pct, z = _scenario_axes(grid, market, stat)
+    
+    fig = go.Figure(go.Heatmap(
+        x=rf_bp,
+        y=pe_pct,
+        z=z,
+        colorscale="RdBu",
+        colorbar=dict(title="ERP (%)"),
+        hovertemplate="rf冲击: %{x:.0f}bp<br>PE冲击: %{y:.0f}%<br>ERP: %{z:.2f}%<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title=f"{market} ERP情景分析（{SCENARIO_STATS[stat]}）",
+        xaxis_title="无风险利率冲击 (bp)",
+        yaxis_title="PE冲击 (%)",
+        template="plotly_white",
+        height=600
+    )
+    
+    return fig
+
+def create_scenario_surface(grid: dict, market: str, stat: str = "latest") -> go.Figure:
+    """创建PE与无风险利率冲击下的ERP情景曲面图"""
+    rf_bp, pe_pct, z = _scenario_axes(grid, market, stat)
+    
+    fig = go.Figure(go.Surface(
+        x=rf_bp,
+        y=pe_pct,
+        z=z,
+        colorscale="RdBu",
+        colorbar=dict(title="ERP (%)"),
+        hovertemplate="rf冲击: %{x:.0f}bp<br>PE冲击: %{y:.0f}%<br>ERP: %{z:.2f}%<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title=f"{market} ERP情景分析（{SCENARIO_STATS[stat]}）",
+        scene=dict(
+            xaxis_title="无风险利率冲击 (bp)",
+            yaxis_title="PE冲击 (%)",
+            zaxis_title="ERP (%)"
+        ),
+        template="plotly_white",
+        height=700
+    )
+    
+    return fig
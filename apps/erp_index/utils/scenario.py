@@ -0,0 +1,119 @@
+import pandas as pd
+import numpy as np
+
+# 默认情景：PE重估 ±20%，无风险利率 ±100bp，各41档
+DEFAULT_PE_SHOCKS = np.linspace(-0.2, 0.2, 41)
+DEFAULT_RF_SHOCKS = np.linspace(-0.01, 0.01, 41)
+
+# 单个日期分块的最大字节数，用于限制情景网格的内存占用
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+def align_market_panel(data: dict, markets: list):
+    """将各市场的 erp 和 pe 按交易日并集对齐为 (市场, 日期) 矩阵
+
+    缺失的日期以NaN填充。返回 (dates, erp, pe)。
+    """
+    frames = [data["time_series"][market] for market in markets]
+    dates = pd.DatetimeIndex(
+        np.unique(np.concatenate([df["trade_date"].to_numpy(dtype="datetime64[ns]") for df in frames]))
+    )
+
+    erp = np.full((len(markets), len(dates)), np.nan)
+    pe = np.full((len(markets), len(dates)), np.nan)
+    for i, df in enumerate(frames):
+        pos = dates.searchsorted(df["trade_date"].to_numpy(dtype="datetime64[ns]"))
+        erp[i, pos] = df["erp"].to_numpy(dtype=np.float64)
+        pe[i, pos] = df["pe"].to_numpy(dtype=np.float64)
+    return dates, erp, pe
+
+def _shock_coefficients(pe_shocks, rf_shocks):
+    """将冲击转换为ERP(%)的增量系数
+
+    ERP = 1/PE - rf，PE 乘以 (1+s) 后 1/PE 变为 1/PE * 1/(1+s)，
+    因此 ERP 变化为 1/PE * (1/(1+s) - 1) - Δrf，再乘以100转为百分比。
+    """
+    pe_shocks = np.asarray(pe_shocks, dtype=np.float64)
+    rf_shocks = np.asarray(rf_shocks, dtype=np.float64)
+    if np.any(pe_shocks <= -1):
+        raise ValueError("PE冲击必须大于-100%")
+    return 100 * (1 / (1 + pe_shocks) - 1), 100 * rf_shocks
+
+def iter_scenario_chunks(erp, pe, pe_shocks, rf_shocks, max_chunk_bytes: int = MAX_CHUNK_BYTES):
+    """按日期分块计算 (市场 × PE冲击 × rf冲击 × 日期) 的情景ERP网格
+
+    每块通过NumPy广播一次计算完成，块大小受 max_chunk_bytes 限制。
+    生成 (日期切片, 情景ERP数组)，数组在下一次迭代时会被复用。
+    """
+    pe_coef, rf_coef = _shock_coefficients(pe_shocks, rf_shocks)
+    n_markets, n_dates = erp.shape
+    bytes_per_date = n_markets * len(pe_coef) * len(rf_coef) * 8
+    chunk = max(1, min(n_dates, max_chunk_bytes // bytes_per_date))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_pe = 1 / pe
+    pe_coef = pe_coef[None, :, None, None]
+    rf_coef = rf_coef[None, None, :, None]
+
+    buffer = np.empty((n_markets, pe_coef.shape[1], rf_coef.shape[2], chunk))
+    for start in range(0, n_dates, chunk):
+        sl = slice(start, min(start + chunk, n_dates))
+        out = buffer[..., :sl.stop - sl.start]
+        np.multiply(inv_pe[:, None, None, sl], pe_coef, out=out)
+        out += erp[:, None, None, sl]
+        out -= rf_coef
+        yield sl, out
+
+def compute_scenario_grid(data: dict, markets: list,
+                          pe_shocks=DEFAULT_PE_SHOCKS, rf_shocks=DEFAULT_RF_SHOCKS,
+                          max_chunk_bytes: int = MAX_CHUNK_BYTES) -> dict:
+    """计算各市场在PE和无风险利率冲击下的ERP情景网格
+
+    返回的 latest、mean、std、min、max 形状均为 (市场, PE冲击, rf冲击)，
+    latest 为各市场最新有效交易日的情景ERP，其余为全历史统计。
+    """
+    pe_shocks = np.asarray(pe_shocks, dtype=np.float64)
+    rf_shocks = np.asarray(rf_shocks, dtype=np.float64)
+    dates, erp, pe = align_market_panel(data, markets)
+
+    # 全历史统计：逐块累计，不保留完整的4维网格
+    shape = (len(markets), len(pe_shocks), len(rf_shocks))
+    count = np.zeros(shape)
+    total = np.zeros(shape)
+    total_sq = np.zeros(shape)
+    grid_min = np.full(shape, np.nan)
+    grid_max = np.full(shape, np.nan)
+    valid_dates = ~np.isnan(erp) & ~np.isnan(pe)
+    for sl, values in iter_scenario_chunks(erp, pe, pe_shocks, rf_shocks, max_chunk_bytes):
+        # 缺失值只取决于市场和日期，与冲击档位无关
+        count += valid_dates[:, sl].sum(axis=-1)[:, None, None]
+        grid_min = np.fmin(grid_min, np.fmin.reduce(values, axis=-1))
+        grid_max = np.fmax(grid_max, np.fmax.reduce(values, axis=-1))
+        np.nan_to_num(values, copy=False)
+        total += values.sum(axis=-1)
+        total_sq += np.einsum("...t,...t->...", values, values)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(total_sq - count * mean * mean, 0) / (count - 1))
+
+    # 最新值：各市场最后一个 erp 和 pe 均有效的交易日
+    latest_idx = np.where(valid_dates.any(axis=1), len(dates) - 1 - np.argmax(valid_dates[:, ::-1], axis=1), 0)
+    rows = np.arange(len(markets))
+    latest_erp = np.where(valid_dates.any(axis=1), erp[rows, latest_idx], np.nan)
+    latest_pe = pe[rows, latest_idx]
+    _, latest = next(iter_scenario_chunks(
+        latest_erp[:, None], latest_pe[:, None], pe_shocks, rf_shocks, max_chunk_bytes
+    ))
+
+    return {
+        "markets": list(markets),
+        "pe_shocks": pe_shocks,
+        "rf_shocks": rf_shocks,
+        "dates": dates,
+        "latest_date": [dates[i] if valid_dates[m].any() else None for m, i in enumerate(latest_idx)],
+        "latest": latest[..., 0].copy(),
+        "mean": mean,
+        "std": std,
+        "min": grid_min,
+        "max": grid_max,
+    }
@@ -0,0 +1,213 @@
+import numpy as np
+
+# 与滚动统计滑块一致的窗口（21~504个交易日，步长21）
+SCAN_WINDOWS = tuple(range(21, 505, 21))
+
+# 默认的ERP(%)阈值
+DEFAULT_THRESHOLDS = (0.0, 2.0, 4.0, 6.0)
+
+# 偏离滚动均值的标准差倍数
+DEFAULT_Z = 2.0
+
+# 事件类型
+CROSS = 0   # 穿越阈值，start == end
+ZSCORE = 1  # 偏离滚动均值超过 ±zσ，start~end 为连续偏离区间（闭区间）
+
+# 事件索引：每条事件记录市场序号、类型、参数（窗口长度或阈值序号）、方向和起止位置，
+# 位置为该市场 time_series 中的行号
+EVENT_DTYPE = np.dtype([
+    ("market", np.int8),
+    ("kind", np.int8),
+    ("param", np.int16),
+    ("direction", np.int8),
+    ("start", np.int32),
+    ("end", np.int32),
+])
+
+def _pad_panel(series: list, starts: np.ndarray) -> np.ndarray:
+    """将各市场 erp 从 starts 开始的部分左对齐为 (市场, 日期) 矩阵，末尾以NaN填充"""
+    lengths = [len(s) - start for s, start in zip(series, starts)]
+    panel = np.full((len(series), max(lengths, default=0)), np.nan)
+    for i, (s, start) in enumerate(zip(series, starts)):
+        panel[i, :len(s) - start] = s[start:]
+    return panel
+
+def rolling_zscore(panel: np.ndarray, windows) -> np.ndarray:
+    """一次计算所有窗口的滚动z值，返回 (市场, 窗口, 日期)
+
+    与 pandas rolling 一致：窗口包含当前值，窗口内有NaN时结果为NaN，标准差 ddof=1。
+    """
+    windows = np.asarray(windows)
+    n_markets, n_dates = panel.shape
+    valid = ~np.isnan(panel)
+
+    # 减去各市场均值后再累加，降低累计平方和的舍入误差
+    counts = valid.sum(axis=1, keepdims=True)
+    center = np.where(valid, panel, 0).sum(axis=1, keepdims=True) / np.maximum(counts, 1)
+    x = np.where(valid, panel - center, 0)
+    zeros = np.zeros((n_markets, 1))
+    cs = np.concatenate([zeros, np.cumsum(x, axis=1)], axis=1)
+    cs2 = np.concatenate([zeros, np.cumsum(x * x, axis=1)], axis=1)
+    cn = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+
+    # 窗口 [t-w+1, t] 的和为 cs[t+1] - cs[t+1-w]
+    end = np.arange(1, n_dates + 1)
+    begin = end[None, :] - windows[:, None]
+    full = begin >= 0
+    begin = np.maximum(begin, 0)
+
+    w = windows[None, :, None].astype(np.float64)
+    s = cs[:, None, end] - cs[:, begin]
+    s2 = cs2[:, None, end] - cs2[:, begin]
+    n = cn[:, None, end] - cn[:, begin]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s / w
+        std = np.sqrt(np.maximum(s2 - s * mean, 0) / (w - 1))
+        z = (x[:, None, :] - mean) / std
+    z[~(full[None, :, :] & (n == w) & valid[:, None, :])] = np.nan
+    return z
+
+def _runs(mask: np.ndarray):
+    """提取 (市场, 参数, 日期) 布尔矩阵中沿日期方向的连续True区间
+
+    返回 (市场下标, 参数下标, 起始, 结束)，结束为闭区间。
+    """
+    padded = np.zeros(mask.shape[:-1] + (mask.shape[-1] + 2,), dtype=np.int8)
+    padded[..., 1:-1] = mask
+    diff = np.diff(padded, axis=-1)
+    m, p, start = np.nonzero(diff == 1)
+    end = np.nonzero(diff == -1)[2] - 1
+    return m, p, start, end
+
+def _records(market, kind, param, direction, start, end) -> np.ndarray:
+    events = np.empty(len(start), dtype=EVENT_DTYPE)
+    events["market"] = market
+    events["kind"] = kind
+    events["param"] = param
+    events["direction"] = direction
+    events["start"] = start
+    events["end"] = end
+    return events
+
+class SignalScanner:
+    """扫描各市场ERP的阈值穿越和滚动z值偏离事件
+
+    所有市场、窗口和阈值在一次向量化计算中完成；scan 全量扫描，
+    update 只扫描上次扫描后新增的行（以最大窗口长度的历史数据为上下文）。
+    """
+
+    def __init__(self, markets: list, windows=SCAN_WINDOWS,
+                 thresholds=DEFAULT_THRESHOLDS, z: float = DEFAULT_Z):
+        self.markets = list(markets)
+        self.windows = np.asarray(windows, dtype=np.int16)
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.z = z
+        self.events = np.empty(0, dtype=EVENT_DTYPE)
+        self._lengths = np.zeros(len(self.markets), dtype=np.int64)
+
+    def scan(self, data: dict) -> np.ndarray:
+        """全量扫描，返回全部事件"""
+        self.events = np.empty(0, dtype=EVENT_DTYPE)
+        self._lengths[:] = 0
+        self.update(data)
+        return self.events
+
+    def update(self, data: dict) -> np.ndarray:
+        """增量扫描新增的行，返回新增的事件
+
+        已有偏离区间若在新增行中延续，直接在 events 中延长其结束位置。
+        假定数据只在末尾追加；若某市场行数减少则重新全量扫描。
+        """
+        series = [data["time_series"][m]["erp"].to_numpy(dtype=np.float64) for m in self.markets]
+        lengths = np.array([len(s) for s in series], dtype=np.int64)
+        if np.any(lengths < self._lengths):
+            return self.scan(data)
+        if np.all(lengths == self._lengths):
+            return np.empty(0, dtype=EVENT_DTYPE)
+
+        old = self._lengths
+        # 上下文需覆盖最大窗口，以重新计算上次扫描最后一行的z值
+        starts = np.maximum(old - int(self.windows.max()), 0)
+        panel = _pad_panel(series, starts)
+        local = np.arange(panel.shape[1])
+        # 上次扫描的最后一行用于衔接未结束的偏离区间
+        keep = local[None, :] >= (np.maximum(old - 1, 0) - starts)[:, None]
+
+        new_events = np.concatenate([
+            self._scan_crossings(panel, starts, old, keep),
+            self._merge_open_runs(self._scan_zscores(panel, starts, keep), old),
+        ])
+        self.events = np.concatenate([self.events, new_events])
+        self.events.sort(order=["market", "kind", "param", "start"])
+        self._lengths = lengths
+        return new_events
+
+    def _scan_crossings(self, panel, starts, old, keep) -> np.ndarray:
+        """相邻两个有效值位于阈值两侧即记为一次穿越"""
+        above = panel[:, None, :] >= self.thresholds[None, :, None]
+        valid = ~np.isnan(panel)
+        both_valid = valid[:, 1:] & valid[:, :-1]
+        crossed = (above[..., 1:] != above[..., :-1]) & both_valid[:, None, :]
+        # 穿越位置为后一个值，只保留新增行
+        is_new = (np.arange(1, panel.shape[1])[None, :] + starts[:, None]) >= old[:, None]
+        crossed &= (is_new & keep[:, 1:])[:, None, :]
+
+        m, p, t = np.nonzero(crossed)
+        direction = np.where(above[m, p, t + 1], 1, -1)
+        pos = t + 1 + starts[m]
+        return _records(m, CROSS, p, direction, pos, pos)
+
+    def _scan_zscores(self, panel, starts, keep) -> np.ndarray:
+        """|z| 超过阈值的连续区间，正负方向分别记录"""
+        z = rolling_zscore(panel, self.windows)
+        keep = keep[:, None, :]
+        records = []
+        for direction, mask in ((1, z > self.z), (-1, z < -self.z)):
+            m, w, start, end = _runs(mask & keep)
+            records.append(_records(m, ZSCORE, self.windows[w], direction,
+                                    start + starts[m], end + starts[m]))
+        return np.concatenate(records)
+
+    def _merge_open_runs(self, events, old) -> np.ndarray:
+        """将从上次扫描最后一行开始的偏离区间并入已有事件，返回其余事件"""
+        continues = (old[events["market"]] > 0) & (events["start"] == old[events["market"]] - 1)
+        if not continues.any():
+            return events
+
+        is_open = (self.events["kind"] == ZSCORE) & (self.events["end"] == old[self.events["market"]] - 1)
+        open_idx = {
+            (e["market"], e["param"], e["direction"]): i
+            for i, e in zip(np.nonzero(is_open)[0], self.events[is_open])
+        }
+        merged = np.zeros(len(events), dtype=bool)
+        for k in np.nonzero(continues)[0]:
+            e = events[k]
+            i = open_idx.get((e["market"], e["param"], e["direction"]))
+            if i is not None:
+                self.events["end"][i] = e["end"]
+                merged[k] = True
+        return events[~merged]
+
+    def select(self, market: str = None, kind: int = None, param=None) -> np.ndarray:
+        """按市场、事件类型和参数筛选事件
+
+        param 对 ZSCORE 为窗口长度，对 CROSS 为阈值（ERP %）。
+        """
+        mask = np.ones(len(self.events), dtype=bool)
+        if market is not None:
+            mask &= self.events["market"] == self.markets.index(market)
+        if kind is not None:
+            mask &= self.events["kind"] == kind
+        if param is not None:
+            if kind == CROSS:
+                matched = np.nonzero(np.isclose(self.thresholds, param))[0]
+                if len(matched) == 0:
+                    raise ValueError(f"未扫描的阈值：{param}")
+                param = int(matched[0])
+            mask &= self.events["param"] == param
+        return self.events[mask]
+
+    def events_by_market(self, kind: int = None, param=None) -> dict:
+        """按市场代码分组的事件，用于在图表上叠加标记"""
+        return {market: self.select(market, kind, param) for market in self.markets}
@@ -0,0 +1,37 @@
+"""滚动统计图渲染基准：比较 svg 与 webgl 后端的 to_json 耗时和数据体积
+
+运行方式（在项目根目录）：
+    python -m benchmarks.bench_plot_render
+"""
+import time
+
+from apps.erp_index.utils.data_loader import ERPDataLoader
+from apps.erp_index.utils.plot_utils import create_rolling_stats_plot
+
+WINDOW = 252
+REPEAT = 5
+
+def bench(data, backend):
+    """返回 (最短构图耗时, 最短序列化耗时, JSON字节数)"""
+    build_times, json_times = [], []
+    payload = b""
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fig = create_rolling_stats_plot(data, WINDOW, backend=backend)
+        build_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        payload = fig.to_json().encode("utf-8")
+        json_times.append(time.perf_counter() - start)
+    return min(build_times), min(json_times), len(payload)
+
+def main():
+    data = ERPDataLoader().load_latest_data()
+    print(f"create_rolling_stats_plot(window={WINDOW})，重复{REPEAT}次取最小值")
+    print(f"{'后端':<8}{'构图(ms)':>12}{'to_json(ms)':>14}{'JSON(KB)':>12}")
+    for backend in ["svg", "webgl"]:
+        build, to_json, size = bench(data, backend)
+        print(f"{backend:<8}{build * 1000:>12.1f}{to_json * 1000:>14.1f}{size / 1024:>12.1f}")
+
+if __name__ == "__main__":
+    main()
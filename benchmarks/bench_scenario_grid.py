@@ -0,0 +1,28 @@
+"""情景网格基准：5个市场 × 41档PE冲击 × 41档rf冲击 × 全历史
+
+运行方式（在项目根目录）：
+    python -m benchmarks.bench_scenario_grid
+"""
+import time
+
+from apps.erp_index.utils.data_loader import ERPDataLoader
+from apps.erp_index.utils.scenario import compute_scenario_grid
+
+MARKETS = ["CSI300", "HSI_mixed", "HSI_cn", "HSI_us", "SPX"]
+REPEAT = 5
+
+def main():
+    data = ERPDataLoader().load_latest_data()
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        grid = compute_scenario_grid(data, MARKETS)
+        times.append(time.perf_counter() - start)
+
+    shape = (len(MARKETS), len(grid["pe_shocks"]), len(grid["rf_shocks"]), len(grid["dates"]))
+    n_cells = shape[0] * shape[1] * shape[2] * shape[3]
+    print(f"网格形状：{shape}，共{n_cells / 1e6:.1f}M个情景ERP")
+    print(f"耗时：最短{min(times) * 1000:.0f}ms，平均{sum(times) / len(times) * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
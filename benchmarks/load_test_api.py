@@ -0,0 +1,95 @@
+"""ERP查询服务压测：统计每秒请求数和p99延迟
+
+默认在本进程内启动一个本地服务实例，也可通过 --url 指向已运行的服务。
+运行方式（在项目根目录）：
+    python -m benchmarks.load_test_api --threads 8 --requests 2000
+"""
+import argparse
+import threading
+import time
+import urllib.request
+from urllib.error import HTTPError
+
+import numpy as np
+
+from apps.erp_index.api_server import create_server
+
+SCENARIOS = {
+    "series单市场": "/series?markets=CSI300&start=2023-01-01",
+    "series批量": "/series?markets=CSI300,HSI_mixed,HSI_cn,HSI_us,SPX",
+    "stats": "/stats?markets=CSI300,HSI_mixed,SPX&start=2022-01-01",
+    "correlation": "/correlation",
+}
+
+def _request(url: str, etag: str = None):
+    """发送请求，返回 (状态码, ETag)"""
+    req = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    if etag:
+        req.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+            return resp.status, resp.headers.get("ETag")
+    except HTTPError as e:
+        # urllib 将304视为异常
+        return e.code, e.headers.get("ETag")
+
+def run(url: str, n_threads: int, n_requests: int, conditional: bool):
+    """并发请求同一URL，返回 (每秒请求数, p50毫秒, p99毫秒, 状态码集合)"""
+    etag = _request(url)[1] if conditional else None
+    latencies = np.empty(n_requests)
+    statuses = set()
+    counter = iter(range(n_requests))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            status, _ = _request(url, etag)
+            latencies[i] = time.perf_counter() - start
+            statuses.add(status)
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return n_requests / elapsed, p50, p99, sorted(statuses)
+
+def main():
+    parser = argparse.ArgumentParser(description="ERP查询服务压测")
+    parser.add_argument("--url", help="已运行服务的地址，如 http://127.0.0.1:8601")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = create_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"目标：{base_url}，并发{args.threads}，每项{args.requests}次请求")
+    print(f"{'场景':<16}{'条件请求':<10}{'req/s':>10}{'p50(ms)':>10}{'p99(ms)':>10}  状态码")
+    try:
+        for name, path in SCENARIOS.items():
+            for conditional in (False, True):
+                rps, p50, p99, statuses = run(base_url + path, args.threads, args.requests, conditional)
+                label = "304" if conditional else "-"
+                print(f"{name:<16}{label:<10}{rps:>10.0f}{p50:>10.2f}{p99:>10.2f}  {statuses}")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    main()